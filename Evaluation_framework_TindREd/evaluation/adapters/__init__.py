@@ -11,11 +11,41 @@ Uso:
     agent = create_tinred_agent()
     response = await agent("Boleta DNI 12345678", session)
 """
+import os
 import sys
+import json
+import functools
+import importlib
+import importlib.util
+import operator
 from pathlib import Path
 from typing import Optional, Callable, Awaitable
 import asyncio
 
+try:
+    import httpx
+except ImportError:  # pragma: no cover - solo se requiere en modo "api"
+    httpx = None
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+# Instancia única del agente mock (es determinístico y sin estado)
+_MOCK_AGENT = None
+
+
+def _get_mock():
+    """Obtiene el agente mock compartido"""
+    global _MOCK_AGENT
+    if _MOCK_AGENT is None:
+        # Importación diferida: solo el modo "mock" la necesita, y si falla
+        # se propaga el error original
+        from evaluators.conversation_simulator import MockAgent
+        _MOCK_AGENT = MockAgent()
+    return _MOCK_AGENT
+
 # Agregar path del proyecto TinRed si está disponible
 TINRED_PROJECT_PATHS = [
     Path("/home/user/tinred-ai-agent"),
@@ -23,20 +53,109 @@ TINRED_PROJECT_PATHS = [
     Path("../tinred-ai-agent"),
 ]
 
+# Reintentos ante HTTP 429 (límite de tasa): espera base, se duplica en cada
+# intento; Retry-After del servidor se respeta hasta RATE_LIMIT_MAX_WAIT_S
+RATE_LIMIT_RETRIES = 3
+RATE_LIMIT_BACKOFF_S = 0.5
+RATE_LIMIT_MAX_WAIT_S = 10.0
+
+# HTTP/2 solo si está instalado h2 (httpx falla al crear el cliente sin él)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class RateLimitError(RuntimeError):
+    """El servicio siguió respondiendo HTTP 429 tras agotar los reintentos"""
+
+def _new_http_client(base_url: str, api_key: Optional[str] = None) -> "httpx.AsyncClient":
+    """Crea un cliente HTTP con pool de conexiones keep-alive para un servicio"""
+    if httpx is None:
+        raise ImportError("httpx es requerido para el modo 'api'")
+    return httpx.AsyncClient(
+        base_url=base_url,
+        timeout=httpx.Timeout(30.0, connect=10.0),
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=300
+        ),
+        http2=HTTP2_AVAILABLE,
+        headers={
+            "Content-Type": "application/json",
+            **({"Authorization": f"Bearer {api_key}"} if api_key else {})
+        }
+    )
+
+
+def _dumps(payload: dict) -> bytes:
+    """Serializa el cuerpo JSON de una petición"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(content: bytes):
+    """Deserializa el cuerpo JSON de una respuesta"""
+    if orjson is not None:
+        return orjson.loads(content)
+    return json.loads(content)
+
+
+def _retry_after(response, default: float) -> float:
+    """Segundos a esperar según la cabecera Retry-After (o el backoff por defecto)"""
+    try:
+        delay = float(response.headers.get("Retry-After", default))
+    except ValueError:
+        delay = default
+    return min(max(delay, 0.0), RATE_LIMIT_MAX_WAIT_S)
+
+
+@functools.lru_cache(maxsize=1)
 def find_tinred_project() -> Optional[Path]:
-    """Busca el proyecto TinRed en ubicaciones conocidas"""
+    """Busca el proyecto TinRed (TINRED_PROJECT_PATH o ubicaciones conocidas)"""
+    env_path = os.getenv("TINRED_PROJECT_PATH")
+    if env_path:
+        path = Path(env_path)
+        return path if (path / "src").is_dir() else None
+    
     for path in TINRED_PROJECT_PATHS:
         if path.exists() and (path / "src").exists():
             return path
     return None
 
 
+@functools.lru_cache(maxsize=1)
+def _load_tinred_modules() -> tuple[Path, type, type]:
+    """
+    Carga (una vez por proceso) las clases del agente TinRed
+    
+    Returns:
+        Tupla (ruta del proyecto, MainOrchestrator, SessionManager)
+    """
+    project_path = find_tinred_project()
+    if project_path is None:
+        raise ImportError("Proyecto TinRed no encontrado")
+    
+    # Los módulos de TinRed importan a sus hermanos por nombre (también dentro
+    # de funciones): src queda en sys.path y se importan con su nombre real,
+    # así orchestrator y el adaptador usan el mismo módulo session_manager
+    src_str = str(project_path / "src")
+    if src_str not in sys.path:
+        sys.path.insert(0, src_str)
+    session_module = importlib.import_module("session_manager")
+    orchestrator_module = importlib.import_module("orchestrator")
+    
+    return project_path, orchestrator_module.MainOrchestrator, session_module.SessionManager
+
+
 class TinRedAgentAdapter:
     """
     Adaptador que envuelve el orquestador de TinRed
     para hacerlo compatible con el framework de evaluación.
     """
     
+    # Campos de la sesión TinRed que se sincronizan de vuelta
+    _SM_FIELDS = operator.attrgetter("emission_data", "awaiting_confirmation", "emission_active")
+    
     def __init__(
         self,
         orchestrator=None,
@@ -59,26 +178,22 @@ class TinRedAgentAdapter:
     
     def _try_import(self):
         """Intenta importar los componentes del agente TinRed"""
-        project_path = find_tinred_project()
+        if find_tinred_project() is None:
+            print("⚠️ Proyecto TinRed no encontrado")
+            return
         
-        if project_path:
-            sys.path.insert(0, str(project_path / "src"))
+        try:
+            project_path, MainOrchestrator, SessionManager = _load_tinred_modules()
             
-            try:
-                from orchestrator import MainOrchestrator
-                from session_manager import SessionManager
-                
-                self.session_manager = SessionManager()
-                self.orchestrator = MainOrchestrator(
-                    session_manager=self.session_manager
-                )
-                print(f"✅ Agente TinRed cargado desde {project_path}")
-                
-            except ImportError as e:
-                print(f"⚠️ No se pudo importar el agente TinRed: {e}")
-                self.orchestrator = None
-        else:
-            print("⚠️ Proyecto TinRed no encontrado")
+            self.session_manager = SessionManager()
+            self.orchestrator = MainOrchestrator(
+                session_manager=self.session_manager
+            )
+            print(f"✅ Agente TinRed cargado desde {project_path}")
+            
+        except (ImportError, FileNotFoundError) as e:
+            print(f"⚠️ No se pudo importar el agente TinRed: {e}")
+            self.orchestrator = None
     
     async def __call__(
         self,
@@ -99,46 +214,41 @@ class TinRedAgentAdapter:
             return "[ERROR: Agente TinRed no disponible]"
         
         try:
-            # Convertir sesión del framework a formato TinRed
-            tinred_session = self._convert_session(session)
+            # TinRed solo necesita los identificadores de la sesión del framework
+            session_id = session.get("session_id", "eval_session")
             
             # Llamar al orquestador
             response = await self.orchestrator.process_message(
                 message=message,
-                session_id=tinred_session.get("session_id", "eval_session"),
-                user_id=tinred_session.get("user_id", "eval_user")
+                session_id=session_id,
+                user_id=session.get("user_id", "eval_user")
             )
             
             # Actualizar sesión del framework con datos de TinRed
-            self._sync_session_back(session, tinred_session)
+            self._sync_session_back(session, session_id)
             
             return response
             
         except Exception as e:
             return f"[ERROR: {str(e)}]"
     
-    def _convert_session(self, eval_session: dict) -> dict:
-        """Convierte sesión del framework a formato TinRed"""
-        return {
-            "session_id": eval_session.get("session_id", "eval_session"),
-            "user_id": eval_session.get("user_id", "eval_user"),
-            "messages": eval_session.get("messages", []),
-            "emission_data": eval_session.get("emission_data", {}),
-            "awaiting_confirmation": eval_session.get("awaiting_confirmation", False),
-            "emission_active": eval_session.get("emission_active", False),
-        }
-    
-    def _sync_session_back(self, eval_session: dict, tinred_session: dict):
+    def _sync_session_back(self, eval_session: dict, session_id: str):
         """Sincroniza cambios de TinRed de vuelta al framework"""
         if self.session_manager:
             try:
-                sm_session = self.session_manager.get_session(
-                    tinred_session.get("session_id", "eval_session")
-                )
+                sm_session = self.session_manager.get_session(session_id)
                 if sm_session:
-                    eval_session["emission_data"] = getattr(sm_session, "emission_data", {})
-                    eval_session["awaiting_confirmation"] = getattr(sm_session, "awaiting_confirmation", False)
-                    eval_session["emission_active"] = getattr(sm_session, "emission_active", False)
+                    try:
+                        emission_data, awaiting_confirmation, emission_active = self._SM_FIELDS(sm_session)
+                    except AttributeError:
+                        emission_data = getattr(sm_session, "emission_data", {})
+                        awaiting_confirmation = getattr(sm_session, "awaiting_confirmation", False)
+                        emission_active = getattr(sm_session, "emission_active", False)
+                    eval_session.update(
+                        emission_data=emission_data,
+                        awaiting_confirmation=awaiting_confirmation,
+                        emission_active=emission_active
+                    )
             except Exception:
                 pass
 
@@ -162,21 +272,37 @@ class TinRedAPIAdapter:
         self.base_url = base_url.rstrip("/")
         self.api_key = api_key
         self._client = None
+        # Event loop en el que se creó el cliente: sus conexiones no sirven en otro
+        self._client_loop = None
     
     async def _get_client(self):
-        """Obtiene o crea el cliente HTTP"""
-        if self._client is None:
-            import httpx
-            self._client = httpx.AsyncClient(
-                base_url=self.base_url,
-                timeout=30.0,
-                headers={
-                    "Content-Type": "application/json",
-                    **({"Authorization": f"Bearer {self.api_key}"} if self.api_key else {})
-                }
-            )
+        """Obtiene o crea el cliente HTTP (propio del adaptador y del event loop actual)"""
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._client_loop is not loop:
+            stale = self._client
+            self._client = _new_http_client(self.base_url, self.api_key)
+            self._client_loop = loop
+            if stale is not None and not stale.is_closed:
+                # Liberar las conexiones del cliente anterior; si su loop ya
+                # terminó, cerrarlo puede fallar y basta con descartarlo
+                try:
+                    await stale.aclose()
+                except Exception:
+                    pass
         return self._client
     
+    def _build_payload(self, message: str, session: dict) -> dict:
+        """Construye el cuerpo de la petición para un mensaje"""
+        return {
+            "message": message,
+            "session_id": session.get("session_id", "eval_session"),
+            "user_id": session.get("user_id", "eval_user"),
+            "context": {
+                "emission_data": session.get("emission_data", {}),
+                "awaiting_confirmation": session.get("awaiting_confirmation", False)
+            }
+        }
+    
     async def __call__(
         self,
         message: str,
@@ -191,37 +317,42 @@ class TinRedAPIAdapter:
             
         Returns:
             Respuesta del agente
+            
+        Raises:
+            RateLimitError: si el servicio sigue respondiendo 429 tras los
+                reintentos (se reporta como error, no como respuesta lenta)
         """
         try:
             client = await self._get_client()
+            body = _dumps(self._build_payload(message, session))
             
-            response = await client.post(
-                "/api/chat",
-                json={
-                    "message": message,
-                    "session_id": session.get("session_id", "eval_session"),
-                    "user_id": session.get("user_id", "eval_user"),
-                    "context": {
-                        "emission_data": session.get("emission_data", {}),
-                        "awaiting_confirmation": session.get("awaiting_confirmation", False)
-                    }
-                }
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                return data.get("response", "[Sin respuesta]")
-            else:
-                return f"[ERROR HTTP {response.status_code}]"
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                # Streaming: el cuerpo solo se lee (y decodifica) si la respuesta es 200
+                async with client.stream("POST", "/api/chat", content=body) as response:
+                    if response.status_code == 200:
+                        data = _loads(await response.aread())
+                        return data.get("response", "[Sin respuesta]")
+                    if response.status_code != 429:
+                        return f"[ERROR HTTP {response.status_code}]"
+                    if attempt == RATE_LIMIT_RETRIES:
+                        raise RateLimitError(
+                            f"HTTP 429 tras {RATE_LIMIT_RETRIES} reintentos"
+                        )
+                    delay = _retry_after(response, RATE_LIMIT_BACKOFF_S * 2 ** attempt)
+                # Límite de tasa (p. ej. cuota de Gemini): esperar y reintentar
+                await asyncio.sleep(delay)
                 
+        except RateLimitError:
+            raise
         except Exception as e:
             return f"[ERROR: {str(e)}]"
-    
+
     async def close(self):
         """Cierra el cliente HTTP"""
         if self._client:
             await self._client.aclose()
             self._client = None
+            self._client_loop = None
 
 
 def create_tinred_agent(
@@ -253,14 +384,7 @@ def create_tinred_agent(
         return adapter
         
     elif mode == "mock":
-        # Importar mock del simulador
-        from evaluators.conversation_simulator import MockAgent
-        mock = MockAgent()
-        
-        async def mock_fn(message: str, session: dict) -> str:
-            return await mock(message, session)
-        
-        return mock_fn
+        return _get_mock()
     
     else:
         raise ValueError(f"Modo no soportado: {mode}")
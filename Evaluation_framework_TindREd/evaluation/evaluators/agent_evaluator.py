@@ -5,13 +5,23 @@ Orquesta la evaluación completa usando todas las métricas
 import sys
 import json
 import asyncio
+import copy
+import hashlib
+import time
 from dataclasses import dataclass, field
 from typing import Optional
 from pathlib import Path
 from datetime import datetime
 
-# Asegurar path del proyecto
-sys.path.insert(0, str(Path(__file__).parent.parent))
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+# Asegurar path del proyecto (una sola vez, aunque el módulo se recargue)
+_PROJECT_ROOT = str(Path(__file__).parent.parent)
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
 
 from config import eval_config, DATASETS_DIR
 from metrics import (
@@ -25,6 +35,15 @@ from metrics.data_extraction import DataExtractionResult, calculate_extraction_a
 from metrics.intent_classification import IntentClassificationResult, calculate_intent_f1
 from metrics.latency import LatencyResult
 
+# Campos de la sesión que condicionan la respuesta del agente (clave de caché)
+_CACHE_SESSION_FIELDS = ("messages", "emission_data", "awaiting_confirmation", "emission_active")
+
+# Cada cuántos escenarios completados se vacía el buffer de progreso
+PROGRESS_FLUSH_EVERY = 10
+
+# Datasets ya parseados, por (ruta, mtime) para invalidar si el archivo cambia
+_SCENARIO_CACHE: dict[tuple[Path, float], list[dict]] = {}
+
 @dataclass
 class ScenarioResult:
     """Resultado de un escenario individual"""
@@ -41,7 +60,6 @@ class ScenarioResult:
 @dataclass
 class EvaluationReport:
     """Reporte completo de evaluación"""
-    timestamp: str
     model_name: str
     total_scenarios: int
     passed_scenarios: int
@@ -65,14 +83,28 @@ class EvaluationReport:
     intent_metrics: Optional[dict] = None
     extraction_metrics: Optional[dict] = None
     
+    # Momento de creación (ns desde epoch); se formatea solo al leer `timestamp`
+    timestamp_ns: int = field(default_factory=time.time_ns)
+    
+    # Resultado global, calculado una sola vez al construir el reporte
+    _overall_pass: bool = field(init=False, repr=False, default=False)
+    
+    def __post_init__(self):
+        self._overall_pass = (
+            self.meets_task_success_target
+            and self.meets_extraction_target
+            and self.meets_intent_f1_target
+            and self.meets_latency_target
+        )
+    
+    @property
+    def timestamp(self) -> str:
+        """Fecha del reporte en formato ISO (hora local)"""
+        return datetime.fromtimestamp(self.timestamp_ns / 1e9).isoformat()
+    
     def overall_pass(self) -> bool:
         """Verifica si pasa todos los targets"""
-        return all([
-            self.meets_task_success_target,
-            self.meets_extraction_target,
-            self.meets_intent_f1_target,
-            self.meets_latency_target
-        ])
+        return self._overall_pass
 
 
 class AgentEvaluator:
@@ -87,7 +119,9 @@ class AgentEvaluator:
         self,
         agent_callable: callable,
         model_name: str = "gemini-2.5-flash",
-        dataset_path: Optional[Path] = None
+        dataset_path: Optional[Path] = None,
+        cache: Optional[dict] = None,
+        max_concurrency: Optional[int] = None
     ):
         """
         Args:
@@ -95,10 +129,20 @@ class AgentEvaluator:
                            Signature: async def agent(message: str, session: dict) -> str
             model_name: Nombre del modelo para el reporte
             dataset_path: Ruta al dataset de escenarios
+            cache: Caché de respuestas del agente (opcional). Solo se usa en
+                   escenarios de un único turno: un acierto no llega al agente,
+                   así que su estado interno (servidor/SessionManager) no avanza
+                   y los turnos siguientes de una conversación serían inválidos.
+                   Mensaje idéntico con el mismo estado de sesión reutiliza la
+                   respuesta. Puede compartirse entre evaluadores; None lo desactiva.
+            max_concurrency: Escenarios evaluados en paralelo
+                             (None = eval_config.parallel_workers)
         """
         self.agent = agent_callable
         self.model_name = model_name
         self.dataset_path = dataset_path or DATASETS_DIR / "test_scenarios.json"
+        self.cache = cache
+        self.max_concurrency = max(1, max_concurrency or eval_config.parallel_workers)
         
         # Inicializar métricas
         self.task_completion_metric = TaskCompletionMetric()
@@ -106,14 +150,58 @@ class AgentEvaluator:
         self.intent_classification_metric = IntentClassificationMetric()
         self.latency_metric = LatencyMetric(target_ms=eval_config.latency_target_seconds * 1000)
         
+        # Métodos de evaluación pre-enlazados (se usan en cada escenario)
+        self._eval_task = self.task_completion_metric.evaluate
+        self._eval_extract = self.data_extraction_metric.evaluate
+        self._eval_intent = self.intent_classification_metric.evaluate
+        
         # Cargar dataset
         self.scenarios = self._load_scenarios()
     
     def _load_scenarios(self) -> list[dict]:
-        """Carga el dataset de escenarios"""
-        with open(self.dataset_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return data.get("scenarios", [])
+        """Carga el dataset de escenarios (cacheado entre evaluadores)"""
+        path = Path(self.dataset_path)
+        key = (path, path.stat().st_mtime)
+        cached = _SCENARIO_CACHE.get(key)
+        if cached is not None:
+            return cached
+        
+        if orjson is not None:
+            data = orjson.loads(path.read_bytes())
+        else:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        scenarios = data.get("scenarios", [])
+        for scenario in scenarios:
+            self._prepare_turns(scenario)
+        
+        _SCENARIO_CACHE[key] = scenarios
+        return scenarios
+    
+    @staticmethod
+    def _prepare_turns(scenario: dict) -> dict:
+        """
+        Precalcula los turnos de la conversación de un escenario
+        
+        - _user_turns: mensajes del usuario en orden
+        - _assistant_prefix: historial del assistant visible antes de cada
+          turno del usuario (más una entrada final con el historial completo)
+        """
+        user_turns: list[str] = []
+        assistant_prefix: list[list[dict]] = []
+        history: list[dict] = []
+        
+        for msg in scenario.get("conversation", []):
+            if msg["role"] == "user":
+                user_turns.append(msg["content"])
+                assistant_prefix.append(list(history))
+            elif msg["role"] == "assistant":
+                history.append({"role": "assistant", "content": msg["content"]})
+        assistant_prefix.append(history)
+        
+        scenario["_user_turns"] = user_turns
+        scenario["_assistant_prefix"] = assistant_prefix
+        return scenario
     
     async def evaluate_scenario(self, scenario: dict) -> ScenarioResult:
         """
@@ -131,34 +219,36 @@ class AgentEvaluator:
         conversation = scenario.get("conversation", [])
         context = scenario.get("context", {})
         
+        if "_user_turns" not in scenario:
+            self._prepare_turns(scenario)
+        user_turns = scenario["_user_turns"]
+        assistant_prefix = scenario["_assistant_prefix"]
+        
         try:
             # Preparar sesión simulada
-            session = self._create_session(context)
+            session = self._create_session(context, scenario_id)
             
             # Ejecutar conversación con medición de latencia
             with self.latency_metric.start_measurement(scenario_id) as timer:
                 # Procesar cada mensaje de la conversación
                 agent_response = ""
-                for msg in conversation:
-                    if msg["role"] == "user":
-                        timer.mark_llm_start()
-                        agent_response = await self.agent(msg["content"], session)
-                        timer.mark_llm_end()
-                    elif msg["role"] == "assistant":
-                        # Mensaje previo del assistant, actualizar sesión
-                        session["messages"].append({
-                            "role": "assistant",
-                            "content": msg["content"]
-                        })
+                use_cache = len(user_turns) == 1
+                for i, user_msg in enumerate(user_turns):
+                    # Historial previo del assistant (copia: el agente puede mutarlo)
+                    session["messages"] = list(assistant_prefix[i])
+                    timer.mark_llm_start()
+                    agent_response = await self._call_agent(user_msg, session, use_cache)
+                    timer.mark_llm_end()
+                session["messages"] = list(assistant_prefix[-1])
             
             # Evaluar task completion
-            task_result = self.task_completion_metric.evaluate(
+            task_result = self._eval_task(
                 response=agent_response,
                 expected=expected
             )
             
             # Evaluar data extraction
-            extraction_result = self.data_extraction_metric.evaluate(
+            extraction_result = self._eval_extract(
                 agent_response=agent_response,
                 expected=expected,
                 session_data=session
@@ -166,7 +256,7 @@ class AgentEvaluator:
             
             # Evaluar intent classification
             user_message = conversation[-1]["content"] if conversation else ""
-            intent_result = self.intent_classification_metric.evaluate(
+            intent_result = self._eval_intent(
                 user_message=user_message,
                 agent_response=agent_response,
                 expected_intent=expected.get("intent", "unknown")
@@ -182,7 +272,7 @@ class AgentEvaluator:
                 task_completion=task_result,
                 data_extraction=extraction_result,
                 intent_classification=intent_result,
-                latency_ms=self.latency_metric.measurements[-1].total_time_ms if self.latency_metric.measurements else 0,
+                latency_ms=timer.result_ms,
                 agent_response=agent_response
             )
             
@@ -194,9 +284,43 @@ class AgentEvaluator:
                 error=str(e)
             )
     
-    def _create_session(self, context: dict) -> dict:
+    async def _call_agent(self, message: str, session: dict, use_cache: bool = False) -> str:
+        """Llama al agente, usando la caché de respuestas si está habilitada"""
+        if self.cache is None or not use_cache:
+            return await self.agent(message, session)
+        
+        key = self._cache_key(message, session)
+        cached = self.cache.get(key)
+        if cached is not None:
+            response, session_after = cached
+            # Copia: la sesión del escenario no debe compartir objetos con la caché
+            session.update(copy.deepcopy(session_after))
+            return response
+        
+        response = await self.agent(message, session)
+        # Guardar también el estado resultante para reproducir el efecto del
+        # agente (copia profunda: la sesión sigue mutando después)
+        self.cache[key] = (response, copy.deepcopy({
+            k: session[k] for k in _CACHE_SESSION_FIELDS[1:] if k in session
+        }))
+        return response
+    
+    @staticmethod
+    def _cache_key(message: str, session: dict) -> tuple[str, bytes]:
+        """Clave de caché: mensaje normalizado + hash del estado de la sesión"""
+        state = {k: session.get(k) for k in _CACHE_SESSION_FIELDS}
+        if orjson is not None:
+            payload = orjson.dumps(state, option=orjson.OPT_SORT_KEYS, default=str)
+        else:
+            payload = json.dumps(state, sort_keys=True, default=str).encode("utf-8")
+        return message.strip().lower(), hashlib.blake2b(payload, digest_size=16).digest()
+    
+    def _create_session(self, context: dict, scenario_id: str = "unknown") -> dict:
         """Crea una sesión simulada para el agente"""
         session = {
+            # Sesión propia por escenario: en paralelo, los turnos de distintos
+            # escenarios no se mezclan en la misma sesión del agente
+            "session_id": f"eval_{scenario_id}",
             "messages": [],
             "emission_data": {},
             "awaiting_confirmation": context.get("awaiting_confirmation", False),
@@ -220,24 +344,55 @@ class AgentEvaluator:
         print(f"📊 Modelo: {self.model_name}")
         print("-" * 50)
         
+        total = len(scenarios_to_run)
+        completed = 0
+
+        # Los escenarios son independientes: se ejecutan en paralelo,
+        # limitados por max_concurrency
+        sem = asyncio.Semaphore(self.max_concurrency)
+
+        async def _run(scenario: dict) -> ScenarioResult:
+            nonlocal completed
+            async with sem:
+                result = await self.evaluate_scenario(scenario)
+            completed += 1
+            status = "✅" if result.success else "❌"
+            sys.stdout.write(f"[{completed}/{total}] Evaluando {result.scenario_id}... {status}\n")
+            # Un flush cada PROGRESS_FLUSH_EVERY escenarios (y al terminar)
+            if completed % PROGRESS_FLUSH_EVERY == 0 or completed == total:
+                sys.stdout.flush()
+            return result
+
+        gathered = await asyncio.gather(
+            *[_run(s) for s in scenarios_to_run],
+            return_exceptions=True
+        )
+
         results: list[ScenarioResult] = []
-        
-        for i, scenario in enumerate(scenarios_to_run, 1):
-            scenario_id = scenario.get("id", f"scenario_{i}")
-            print(f"[{i}/{len(scenarios_to_run)}] Evaluando {scenario_id}...", end=" ")
-            
-            result = await self.evaluate_scenario(scenario)
+        for scenario, result in zip(scenarios_to_run, gathered):
+            if isinstance(result, BaseException):
+                result = ScenarioResult(
+                    scenario_id=scenario.get("id", "unknown"),
+                    category=scenario.get("category", "unknown"),
+                    success=False,
+                    error=str(result)
+                )
             results.append(result)
-            
-            status = "✅" if result.success else "❌"
-            print(f"{status}")
-        
+
         print("-" * 50)
         
-        # Calcular métricas agregadas
-        task_results = [r.task_completion for r in results if r.task_completion]
-        extraction_results = [r.data_extraction for r in results if r.data_extraction]
-        intent_results = [r.intent_classification for r in results if r.intent_classification]
+        # Calcular métricas agregadas (una sola pasada sobre los resultados)
+        task_results, extraction_results, intent_results = [], [], []
+        passed_scenarios = 0
+        for r in results:
+            if r.task_completion is not None:
+                task_results.append(r.task_completion)
+            if r.data_extraction is not None:
+                extraction_results.append(r.data_extraction)
+            if r.intent_classification is not None:
+                intent_results.append(r.intent_classification)
+            if r.success:
+                passed_scenarios += 1
         
         task_success_rate = calculate_task_success_rate(task_results)
         extraction_metrics = calculate_extraction_accuracy(extraction_results)
@@ -246,11 +401,10 @@ class AgentEvaluator:
         
         # Crear reporte
         report = EvaluationReport(
-            timestamp=datetime.now().isoformat(),
             model_name=self.model_name,
             total_scenarios=len(results),
-            passed_scenarios=sum(1 for r in results if r.success),
-            failed_scenarios=sum(1 for r in results if not r.success),
+            passed_scenarios=passed_scenarios,
+            failed_scenarios=len(results) - passed_scenarios,
             
             task_success_rate=task_success_rate,
             data_extraction_accuracy=extraction_metrics.get("overall", 0.0),
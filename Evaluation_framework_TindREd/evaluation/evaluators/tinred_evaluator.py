@@ -4,18 +4,132 @@ Versión 2.0 con datos reales
 """
 import json
 import logging
+import re
 import asyncio
 import aiohttp
 import time
+from collections import Counter, defaultdict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Tuple
-from dataclasses import dataclass, field, asdict
+from typing import Dict, List, Any, Optional, Tuple, Callable
+from dataclasses import dataclass, field
 from enum import Enum
+from html import escape
+from string import Template
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Espera base entre reintentos de _send_message (se duplica en cada intento)
+RETRY_BACKOFF_S = 0.1
+# Respuestas del gateway que indican que el mensaje no llegó al agente
+_GATEWAY_RETRY_STATUSES = frozenset({502, 503, 504})
+
+# Datasets ya parseados, por (ruta, mtime_ns) para invalidar si el archivo cambia
+_DATASET_CACHE: dict[tuple[str, int], Dict] = {}
+
+# Palabras clave de _classify_intent, una alternativa compilada por regla
+# (coincidencia por subcadena sobre el texto en minúsculas).
+_GREETING_RE = re.compile(r"hola|buenos días|buenas tardes|buenas noches|hey|hi|buenas")
+_QUESTION_RE = re.compile(r"\?|qué|que|cómo|como|cuál|cual|diferencia|ayuda|explicar")
+_QUESTION_EMIT_RE = re.compile(r"emitir|generar|hacer una|quiero una")
+_CANCEL_RE = re.compile(r"cancelar|cancela|no quiero|olvida|salir|detener")
+_HISTORY_RE = re.compile(r"historial|histórico")
+_EMIT_RE = re.compile(r"factura|boleta|emitir")
+
+
+def _is_question(text_lower: str) -> bool:
+    """Pregunta general: '?' o palabra interrogativa, sin pedir una emisión."""
+    return bool(_QUESTION_RE.search(text_lower)) and not _QUESTION_EMIT_RE.search(text_lower)
+
+
+# Prefijos de confirmación (str.startswith acepta la tupla completa)
+_CONFIRM_PREFIXES = ("si", "sí", "yes", "ok", "confirmo", "acepto", "dale", "adelante")
+
+
+def _is_confirmation(text_lower: str) -> bool:
+    """Confirmación: el mensaje empieza por uno de _CONFIRM_PREFIXES."""
+    return text_lower.lstrip().startswith(_CONFIRM_PREFIXES)
+
+
+def _field_check(key: str, expected_value: Any) -> Callable[[Dict, List[str]], None]:
+    """Comprobación de un campo escalar de la extracción."""
+    missing = f"Falta campo: {key}"
+    
+    def check(extracted: Dict, errors: List[str]) -> None:
+        if key not in extracted:
+            errors.append(missing)
+        elif extracted[key] != expected_value:
+            errors.append(f"{key}: esperado {expected_value}, obtenido {extracted[key]}")
+    
+    return check
+
+
+def _items_check(exp_items: List[Dict]) -> Callable[[Dict, List[str]], None]:
+    """Comprobación de items: solo cantidad y precio, en orden."""
+    expected_pairs = [(exp.get("cantidad"), exp.get("precio")) for exp in exp_items]
+    expected_len = len(expected_pairs)
+    
+    def check(extracted: Dict, errors: List[str]) -> None:
+        if "items" not in extracted:
+            errors.append("Falta campo: items")
+            return
+        ext_items = extracted["items"]
+        if len(ext_items) != expected_len:
+            errors.append(f"items: cantidad diferente - esperado {expected_len}, obtenido {len(ext_items)}")
+            return
+        for i, (ext, (cantidad, precio)) in enumerate(zip(ext_items, expected_pairs)):
+            if ext.get("cantidad") != cantidad:
+                errors.append(f"item[{i}].cantidad: esperado {cantidad}, obtenido {ext.get('cantidad')}")
+            if ext.get("precio") != precio:
+                errors.append(f"item[{i}].precio: esperado {precio}, obtenido {ext.get('precio')}")
+    
+    return check
+
+
+def _build_extraction_comparator(expected: Dict) -> Callable[[Dict], List[str]]:
+    """
+    Especializa la comparación de _compare_extraction para un expected fijo.
+    
+    El despacho por clave se resuelve una vez al cargar el dataset; el
+    comparador devuelto solo recorre las comprobaciones, en el orden de
+    expected, y devuelve la lista de errores.
+    """
+    checks = [
+        _items_check(value) if key == "items" else _field_check(key, value)
+        for key, value in expected.items()
+    ]
+    
+    def compare(extracted: Dict) -> List[str]:
+        errors: List[str] = []
+        for check in checks:
+            check(extracted, errors)
+        return errors
+    
+    return compare
+
+
+# Reglas de _classify_intent en orden de prioridad
+_INTENT_RULES = (
+    ("GREETING", _GREETING_RE.search),
+    ("GENERAL_QUESTION", _is_question),
+    ("CANCEL", _CANCEL_RE.search),
+    ("CONFIRMATION", _is_confirmation),
+    ("QUERY_HISTORY", _HISTORY_RE.search),
+    ("QUERY_PRODUCTS", re.compile(r"producto").search),
+    ("EMIT_INVOICE", _EMIT_RE.search),
+)
+
+# Patrones de datos usados por _extract_data
+_DNI_RE = re.compile(r"\b(\d{8})\b")
+_RUC_RE = re.compile(r"\b([12]0\d{9})\b")
+_ITEMS_RE = re.compile(r"(\d+)\s+(.+?)\s+a\s+(\d+(?:\.\d+)?)")
+
 
 class TestStatus(str, Enum):
     PASSED = "passed"
@@ -24,7 +138,7 @@ class TestStatus(str, Enum):
     ERROR = "error"
 
 
-@dataclass
+@dataclass(slots=True)
 class TestResult:
     scenario_id: str
     category: str
@@ -35,10 +149,19 @@ class TestResult:
     errors: List[str] = field(default_factory=list)
     
     def to_dict(self) -> Dict:
-        return asdict(self)
+        # Sin deepcopy: details y errors se comparten, el dict se serializa y descarta
+        return {
+            "scenario_id": self.scenario_id,
+            "category": self.category,
+            "name": self.name,
+            "status": self.status.value,
+            "duration_ms": self.duration_ms,
+            "details": self.details,
+            "errors": self.errors
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class EvaluationReport:
     timestamp: str
     total_scenarios: int
@@ -75,25 +198,67 @@ class TinRedEvaluator:
         self.config = config or {}
         self.api_url = self.config.get("api_url", "http://localhost:8000")
         self.timeout = self.config.get("timeout", 30)
+        self.concurrency = max(1, self.config.get("concurrency", 8))
+        # Intentos por mensaje cuando no llegó al agente (1 = sin reintentos)
+        self.retries = max(1, self.config.get("retries", 3))
+        # Guardar todas las respuestas en details (depuración)
+        self.keep_full_transcript = self.config.get("keep_full_transcript", False)
         self.results: List[TestResult] = []
+        # Sesión HTTP compartida durante run_all_tests (pool keep-alive)
+        self._session: Optional[aiohttp.ClientSession] = None
         
         # Cargar datos de prueba
         self.test_data = self._load_test_data()
     
     def _load_test_data(self) -> Dict:
-        """Carga el dataset de prueba."""
+        """Carga el dataset de prueba (cacheado entre evaluadores)."""
         dataset_path = Path(__file__).parent.parent / "datasets" / "test_scenarios_v2.json"
         
-        if dataset_path.exists():
+        try:
+            key = (str(dataset_path), dataset_path.stat().st_mtime_ns)
+        except FileNotFoundError:
+            logger.warning(f"Dataset no encontrado: {dataset_path}")
+            return {"scenarios": [], "test_data": {}}
+        
+        cached = _DATASET_CACHE.get(key)
+        if cached is not None:
+            return cached
+        
+        if orjson is not None:
+            data = orjson.loads(dataset_path.read_bytes())
+        else:
             with open(dataset_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        
-        logger.warning(f"Dataset no encontrado: {dataset_path}")
-        return {"scenarios": [], "test_data": {}}
+                data = json.load(f)
+        for scenario in data.get("scenarios", []):
+            for turn in scenario.get("conversation", []):
+                self._normalize_expectations(turn)
+            if "expected_extraction" in scenario:
+                scenario["_cmp"] = _build_extraction_comparator(scenario["expected_extraction"])
+        
+        _DATASET_CACHE[key] = data
+        return data
+    
+    @staticmethod
+    def _normalize_expectations(turn: Dict) -> None:
+        """
+        Precalcula expected_contains/expected_not_contains como pares
+        (texto original, texto en minúsculas) en _expected_contains y
+        _expected_not_contains; los campos originales no se modifican.
+        """
+        for key in ("expected_contains", "expected_not_contains"):
+            if key in turn:
+                turn[f"_{key}"] = TinRedEvaluator._expectation_pairs(turn[key])
+    
+    @staticmethod
+    def _expectation_pairs(texts) -> List[Tuple[str, str]]:
+        """Pares (original para los mensajes, minúsculas para comparar)."""
+        if isinstance(texts, str):
+            texts = [texts]
+        return [(text, text.lower()) for text in texts]
     
     async def run_all_tests(self, categories: List[str] = None) -> EvaluationReport:
         """Ejecuta todos los tests o los de categorías específicas."""
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         scenarios = self.test_data.get("scenarios", [])
         
         if categories:
@@ -101,11 +266,40 @@ class TinRedEvaluator:
         
         logger.info(f"🚀 Iniciando evaluación de {len(scenarios)} escenarios...")
         
-        for scenario in scenarios:
-            result = await self._run_scenario(scenario)
-            self.results.append(result)
+        # Los escenarios de entrada única y batch se ejecutan en paralelo
+        # acotados por el semáforo. Las conversaciones comparten la sesión del
+        # teléfono de prueba en el servidor: van de a una (el Lock es FIFO y
+        # conserva el orden del dataset) y sus turnos siguen en orden.
+        semaphore = asyncio.Semaphore(self.concurrency)
+        conversation_lock = asyncio.Lock()
+        
+        async def _guarded(scenario: Dict) -> TestResult:
+            if "conversation" in scenario:
+                async with conversation_lock, semaphore:
+                    return await self._run_scenario(scenario)
+            async with semaphore:
+                return await self._run_scenario(scenario)
+        
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=20,
+            keepalive_timeout=30,
+            ttl_dns_cache=300
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = [tg.create_task(_guarded(s)) for s in scenarios]
+        finally:
+            await self._session.close()
+            self._session = None
         
-        duration = (time.time() - start_time) * 1000
+        self.results.extend(task.result() for task in tasks)
+        
+        duration = (time.perf_counter_ns() - start_ns) * 1e-6
         return self._generate_report(duration)
     
     async def _run_scenario(self, scenario: Dict) -> TestResult:
@@ -116,7 +310,7 @@ class TinRedEvaluator:
         
         logger.info(f"  📋 [{scenario_id}] {name}")
         
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
             # Determinar tipo de test
@@ -136,11 +330,11 @@ class TinRedEvaluator:
                     details={"reason": "Tipo de test no reconocido"}
                 )
             
-            result.duration_ms = (time.time() - start_time) * 1000
+            result.duration_ms = (time.perf_counter_ns() - start_ns) * 1e-6
             return result
             
         except Exception as e:
-            duration = (time.time() - start_time) * 1000
+            duration = (time.perf_counter_ns() - start_ns) * 1e-6
             logger.error(f"    ❌ Error: {e}")
             return TestResult(
                 scenario_id=scenario_id,
@@ -162,33 +356,33 @@ class TinRedEvaluator:
         session_phone = self.config.get("test_phone", "573134723604")
         responses = []
         
-        async with aiohttp.ClientSession() as session:
-            for turn in conversation:
-                if turn["role"] == "user":
-                    # Enviar mensaje del usuario
-                    response = await self._send_message(session, session_phone, turn["content"])
-                    responses.append(response)
+        for turn in conversation:
+            if turn["role"] == "user":
+                # Enviar mensaje del usuario
+                response = await self._send_message(self._session, session_phone, turn["content"])
+                responses.append(response)
+                
+                # Validar respuesta si hay expectativas
+            elif turn["role"] == "assistant":
+                if responses:
+                    last_response = responses[-1]
+                    validation = self._validate_response(last_response, turn)
                     
-                    # Validar respuesta si hay expectativas
-                elif turn["role"] == "assistant":
-                    if responses:
-                        last_response = responses[-1]
-                        validation = self._validate_response(last_response, turn)
-                        
-                        if not validation["passed"]:
-                            return TestResult(
-                                scenario_id=scenario_id,
-                                category=category,
-                                name=name,
-                                status=TestStatus.FAILED,
-                                duration_ms=0,
-                                details={
-                                    "responses": responses,
-                                    "failed_at": len(responses),
-                                    "validation": validation
-                                },
-                                errors=validation.get("errors", [])
-                            )
+                    if not validation["passed"]:
+                        return TestResult(
+                            scenario_id=scenario_id,
+                            category=category,
+                            name=name,
+                            status=TestStatus.FAILED,
+                            duration_ms=0,
+                            details={
+                                "responses": responses if self.keep_full_transcript else responses[-3:],
+                                "all_turns": len(responses),
+                                "failed_at": len(responses),
+                                "validation": validation
+                            },
+                            errors=validation.get("errors", [])
+                        )
         
         # Validar datos esperados si existen
         expected_data = scenario.get("expected_data", {})
@@ -211,7 +405,11 @@ class TinRedEvaluator:
             name=name,
             status=TestStatus.PASSED,
             duration_ms=0,
-            details={"responses": responses, "turns": len(responses)}
+            details=(
+                {"responses": responses, "turns": len(responses)}
+                if self.keep_full_transcript
+                else {"last_reply": responses[-1] if responses else None, "turns": len(responses)}
+            )
         )
     
     async def _run_single_input_test(self, scenario: Dict) -> TestResult:
@@ -251,7 +449,12 @@ class TinRedEvaluator:
             extracted = await self._extract_data(input_text)
             expected = scenario["expected_extraction"]
             
-            validation = self._compare_extraction(extracted, expected)
+            compare = scenario.get("_cmp")
+            if compare is not None:
+                errors = compare(extracted)
+                validation = {"passed": not errors, "errors": errors}
+            else:
+                validation = self._compare_extraction(extracted, expected)
             
             return TestResult(
                 scenario_id=scenario_id,
@@ -279,12 +482,14 @@ class TinRedEvaluator:
         name = scenario["name"]
         documents = scenario.get("documents", [])
         
-        results = []
-        
-        async with aiohttp.ClientSession() as session:
-            for doc in documents:
-                is_valid = await self._validate_document(session, doc)
-                results.append({"document": doc, "valid": is_valid})
+        # Las validaciones son independientes; gather conserva el orden
+        valids = await asyncio.gather(
+            *(self._validate_document(self._session, doc) for doc in documents)
+        )
+        results = [
+            {"document": doc, "valid": is_valid}
+            for doc, is_valid in zip(documents, valids)
+        ]
         
         all_valid = all(r["valid"] for r in results)
         expected_valid = scenario.get("expected_valid", True)
@@ -299,88 +504,72 @@ class TinRedEvaluator:
         )
     
     async def _send_message(self, session: aiohttp.ClientSession, phone: str, message: str) -> Dict:
-        """Envía un mensaje al agente."""
+        """
+        Envía un mensaje al agente (el timeout lo define la sesión).
+        
+        /api/converse no es idempotente (cada llamada avanza la conversación
+        del teléfono): solo se reintenta, con backoff exponencial, cuando la
+        petición no llegó al agente (error al conectar o 502/503/504 del
+        gateway). Timeouts, desconexiones y otros errores se devuelven sin
+        reintentar.
+        """
         url = f"{self.api_url}/api/converse"
         payload = {"phone": phone, "message": message}
         
-        try:
-            async with session.post(url, json=payload, timeout=self.timeout) as resp:
-                if resp.status == 200:
-                    return await resp.json()
-                else:
-                    return {"error": f"HTTP {resp.status}", "reply": ""}
-        except asyncio.TimeoutError:
-            return {"error": "Timeout", "reply": ""}
-        except Exception as e:
-            return {"error": str(e), "reply": ""}
+        error = {"error": "Timeout", "reply": ""}
+        for attempt in range(self.retries):
+            if attempt:
+                await asyncio.sleep(RETRY_BACKOFF_S * (2 ** (attempt - 1)))
+            try:
+                async with session.post(url, json=payload) as resp:
+                    if resp.status == 200:
+                        return await resp.json()
+                    error = {"error": f"HTTP {resp.status}", "reply": ""}
+                    if resp.status not in _GATEWAY_RETRY_STATUSES:
+                        return error
+            except aiohttp.ClientConnectorError as e:
+                error = {"error": str(e), "reply": ""}
+            except asyncio.TimeoutError:
+                return {"error": "Timeout", "reply": ""}
+            except Exception as e:
+                return {"error": str(e), "reply": ""}
+        return error
     
     async def _classify_intent(self, text: str) -> str:
         """Clasifica el intent de un texto (mock o real)."""
         text_lower = text.lower()
         
-        # Prioridad 1: Saludos (antes que todo)
-        greetings = ['hola', 'buenos días', 'buenas tardes', 'buenas noches', 'hey', 'hi', 'buenas']
-        if any(g in text_lower for g in greetings):
-            return "GREETING"
-        
-        # Prioridad 2: Preguntas (detectar ? o palabras de pregunta)
-        question_words = ['qué', 'que', 'cómo', 'como', 'cuál', 'cual', 'diferencia', 'ayuda', 'explicar']
-        if '?' in text_lower or any(q in text_lower for q in question_words):
-            # Solo si NO menciona explícitamente emitir
-            if not any(e in text_lower for e in ['emitir', 'generar', 'hacer una', 'quiero una']):
-                return "GENERAL_QUESTION"
-        
-        # Prioridad 3: Cancelación
-        cancel_words = ['cancelar', 'cancela', 'no quiero', 'olvida', 'salir', 'detener']
-        if any(c in text_lower for c in cancel_words):
-            return "CANCEL"
-        
-        # Prioridad 4: Confirmación
-        confirm_words = ['si', 'sí', 'yes', 'ok', 'confirmo', 'acepto', 'dale', 'adelante']
-        if any(text_lower.strip().startswith(c) for c in confirm_words):
-            return "CONFIRMATION"
-        
-        # Prioridad 5: Historial
-        if 'historial' in text_lower or 'histórico' in text_lower:
-            return "QUERY_HISTORY"
-        
-        # Prioridad 6: Productos
-        if 'producto' in text_lower:
-            return "QUERY_PRODUCTS"
-        
-        # Prioridad 7: Emisión
-        if any(w in text_lower for w in ['factura', 'boleta', 'emitir']):
-            return "EMIT_INVOICE"
+        for intent, matches in _INTENT_RULES:
+            if matches(text_lower):
+                return intent
         
         return "UNKNOWN"
     
     async def _extract_data(self, text: str) -> Dict:
         """Extrae datos de un mensaje (mock o real)."""
-        import re
-        
         extracted = {}
+        text_lower = text.lower()
         
         # Extraer tipo de documento
-        if 'boleta' in text.lower():
+        if 'boleta' in text_lower:
             extracted['document_type'] = '03'
-        elif 'factura' in text.lower():
+        elif 'factura' in text_lower:
             extracted['document_type'] = '01'
         
         # Extraer DNI
-        dni_match = re.search(r'\b(\d{8})\b', text)
+        dni_match = _DNI_RE.search(text)
         if dni_match:
             extracted['id_type'] = '1'
             extracted['id_number'] = dni_match.group(1)
         
         # Extraer RUC
-        ruc_match = re.search(r'\b([12]0\d{9})\b', text)
+        ruc_match = _RUC_RE.search(text)
         if ruc_match:
             extracted['id_type'] = '6'
             extracted['id_number'] = ruc_match.group(1)
         
         # Extraer items
-        items_pattern = r'(\d+)\s+(.+?)\s+a\s+(\d+(?:\.\d+)?)'
-        items = re.findall(items_pattern, text)
+        items = _ITEMS_RE.findall(text)
         if items:
             extracted['items'] = [
                 {"cantidad": i[0], "descripcion": i[1].strip(), "precio": i[2]}
@@ -404,25 +593,25 @@ class TinRedEvaluator:
         errors = []
         passed = True
         
+        # Las expectativas en minúsculas vienen precalculadas (_normalize_expectations);
+        # los mensajes de error muestran el texto original
         # Validar que contiene texto esperado
         if "expected_contains" in expected:
-            contains = expected["expected_contains"]
-            if isinstance(contains, str):
-                contains = [contains]
-            
-            for text in contains:
-                if text.lower() not in reply:
+            pairs = expected.get("_expected_contains")
+            if pairs is None:
+                pairs = self._expectation_pairs(expected["expected_contains"])
+            for text, text_lower in pairs:
+                if text_lower not in reply:
                     errors.append(f"Respuesta no contiene: '{text}'")
                     passed = False
         
         # Validar que NO contiene texto
         if "expected_not_contains" in expected:
-            not_contains = expected["expected_not_contains"]
-            if isinstance(not_contains, str):
-                not_contains = [not_contains]
-            
-            for text in not_contains:
-                if text.lower() in reply:
+            pairs = expected.get("_expected_not_contains")
+            if pairs is None:
+                pairs = self._expectation_pairs(expected["expected_not_contains"])
+            for text, text_lower in pairs:
+                if text_lower in reply:
                     errors.append(f"Respuesta contiene texto prohibido: '{text}'")
                     passed = False
         
@@ -460,27 +649,28 @@ class TinRedEvaluator:
     
     def _generate_report(self, duration_ms: float) -> EvaluationReport:
         """Genera el reporte de evaluación."""
-        passed = sum(1 for r in self.results if r.status == TestStatus.PASSED)
-        failed = sum(1 for r in self.results if r.status == TestStatus.FAILED)
-        skipped = sum(1 for r in self.results if r.status == TestStatus.SKIPPED)
-        errors = sum(1 for r in self.results if r.status == TestStatus.ERROR)
+        # Conteos globales y por categoría en una sola pasada
+        counts = Counter()
+        by_category = defaultdict(lambda: {"total": 0, "passed": 0, "failed": 0})
+        passed_status, failed_status = TestStatus.PASSED, TestStatus.FAILED
+        for result in self.results:
+            status = result.status
+            counts[status] += 1
+            stats = by_category[result.category]
+            stats["total"] += 1
+            if status is passed_status:
+                stats["passed"] += 1
+            elif status is failed_status:
+                stats["failed"] += 1
+        
+        passed = counts[TestStatus.PASSED]
+        failed = counts[TestStatus.FAILED]
+        skipped = counts[TestStatus.SKIPPED]
+        errors = counts[TestStatus.ERROR]
         total = len(self.results)
         
         pass_rate = (passed / total * 100) if total > 0 else 0
         
-        # Agrupar por categoría
-        by_category = {}
-        for result in self.results:
-            cat = result.category
-            if cat not in by_category:
-                by_category[cat] = {"total": 0, "passed": 0, "failed": 0}
-            
-            by_category[cat]["total"] += 1
-            if result.status == TestStatus.PASSED:
-                by_category[cat]["passed"] += 1
-            elif result.status == TestStatus.FAILED:
-                by_category[cat]["failed"] += 1
-        
         return EvaluationReport(
             timestamp=datetime.now().isoformat(),
             total_scenarios=total,
@@ -490,120 +680,66 @@ class TinRedEvaluator:
             errors=errors,
             pass_rate=pass_rate,
             duration_total_ms=duration_ms,
-            results_by_category=by_category,
+            results_by_category=dict(by_category),
             results=self.results
         )
 
 
-class ReportGenerator:
-    """Genera reportes en diferentes formatos."""
-    
-    @staticmethod
-    def to_json(report: EvaluationReport, filepath: str) -> None:
-        """Guarda reporte en JSON."""
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(report.to_dict(), f, indent=2, ensure_ascii=False)
-    
-    @staticmethod
-    def to_markdown(report: EvaluationReport, filepath: str) -> None:
-        """Guarda reporte en Markdown."""
-        md = f"""# Reporte de Evaluación TinRed Agent
-
-**Fecha:** {report.timestamp}
-
-## Resumen
-
-| Métrica | Valor |
-|---------|-------|
-| Total Escenarios | {report.total_scenarios} |
-| ✅ Pasados | {report.passed} |
-| ❌ Fallidos | {report.failed} |
-| ⏭️ Saltados | {report.skipped} |
-| ⚠️ Errores | {report.errors} |
-| **Tasa de Éxito** | **{report.pass_rate:.2f}%** |
-| Duración | {report.duration_total_ms:.0f}ms |
-
-## Resultados por Categoría
-
-| Categoría | Total | Pasados | Fallidos | Tasa |
-|-----------|-------|---------|----------|------|
-"""
-        for cat, stats in report.results_by_category.items():
-            rate = (stats["passed"] / stats["total"] * 100) if stats["total"] > 0 else 0
-            md += f"| {cat} | {stats['total']} | {stats['passed']} | {stats['failed']} | {rate:.0f}% |\n"
-        
-        md += "\n## Detalles de Tests Fallidos\n\n"
-        
-        for result in report.results:
-            if result.status == TestStatus.FAILED:
-                md += f"### ❌ [{result.scenario_id}] {result.name}\n\n"
-                md += f"**Categoría:** {result.category}\n\n"
-                if result.errors:
-                    md += "**Errores:**\n"
-                    for error in result.errors:
-                        md += f"- {error}\n"
-                md += "\n"
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(md)
-    
-    @staticmethod
-    def to_html(report: EvaluationReport, filepath: str) -> None:
-        """Guarda reporte en HTML."""
-        html = f"""<!DOCTYPE html>
+# Plantilla del reporte HTML de TinRedEvaluator (se compila una vez al importar)
+_REPORT_HTML = Template("""<!DOCTYPE html>
 <html lang="es">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>Evaluación TinRed Agent</title>
     <style>
-        * {{ box-sizing: border-box; margin: 0; padding: 0; }}
-        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; background: #f5f5f5; padding: 20px; }}
-        .container {{ max-width: 1200px; margin: 0 auto; }}
-        .card {{ background: white; border-radius: 12px; padding: 24px; margin-bottom: 20px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }}
-        h1 {{ color: #1a1a1a; margin-bottom: 8px; }}
-        .timestamp {{ color: #666; font-size: 14px; margin-bottom: 24px; }}
-        .metrics {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 16px; margin-bottom: 24px; }}
-        .metric {{ text-align: center; padding: 16px; border-radius: 8px; }}
-        .metric.passed {{ background: #e8f5e9; }}
-        .metric.failed {{ background: #ffebee; }}
-        .metric.rate {{ background: #e3f2fd; }}
-        .metric-value {{ font-size: 36px; font-weight: bold; }}
-        .metric-label {{ color: #666; font-size: 14px; margin-top: 4px; }}
-        table {{ width: 100%; border-collapse: collapse; }}
-        th, td {{ padding: 12px; text-align: left; border-bottom: 1px solid #eee; }}
-        th {{ background: #f8f9fa; font-weight: 600; }}
-        .status {{ padding: 4px 8px; border-radius: 4px; font-size: 12px; font-weight: 500; }}
-        .status.passed {{ background: #c8e6c9; color: #2e7d32; }}
-        .status.failed {{ background: #ffcdd2; color: #c62828; }}
-        .status.skipped {{ background: #fff9c4; color: #f9a825; }}
-        .progress {{ width: 100%; height: 8px; background: #ffcdd2; border-radius: 4px; overflow: hidden; }}
-        .progress-bar {{ height: 100%; background: #4caf50; }}
+        * { box-sizing: border-box; margin: 0; padding: 0; }
+        body { font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif; background: #f5f5f5; padding: 20px; }
+        .container { max-width: 1200px; margin: 0 auto; }
+        .card { background: white; border-radius: 12px; padding: 24px; margin-bottom: 20px; box-shadow: 0 2px 8px rgba(0,0,0,0.1); }
+        h1 { color: #1a1a1a; margin-bottom: 8px; }
+        .timestamp { color: #666; font-size: 14px; margin-bottom: 24px; }
+        .metrics { display: grid; grid-template-columns: repeat(auto-fit, minmax(150px, 1fr)); gap: 16px; margin-bottom: 24px; }
+        .metric { text-align: center; padding: 16px; border-radius: 8px; }
+        .metric.passed { background: #e8f5e9; }
+        .metric.failed { background: #ffebee; }
+        .metric.rate { background: #e3f2fd; }
+        .metric-value { font-size: 36px; font-weight: bold; }
+        .metric-label { color: #666; font-size: 14px; margin-top: 4px; }
+        table { width: 100%; border-collapse: collapse; }
+        th, td { padding: 12px; text-align: left; border-bottom: 1px solid #eee; }
+        th { background: #f8f9fa; font-weight: 600; }
+        .status { padding: 4px 8px; border-radius: 4px; font-size: 12px; font-weight: 500; }
+        .status.passed { background: #c8e6c9; color: #2e7d32; }
+        .status.failed { background: #ffcdd2; color: #c62828; }
+        .status.skipped { background: #fff9c4; color: #f9a825; }
+        .progress { width: 100%; height: 8px; background: #ffcdd2; border-radius: 4px; overflow: hidden; }
+        .progress-bar { height: 100%; background: #4caf50; }
     </style>
 </head>
 <body>
     <div class="container">
         <div class="card">
             <h1>🤖 Evaluación TinRed Agent</h1>
-            <p class="timestamp">Generado: {report.timestamp}</p>
+            <p class="timestamp">Generado: ${timestamp}</p>
             
             <div class="metrics">
                 <div class="metric passed">
-                    <div class="metric-value">{report.passed}</div>
+                    <div class="metric-value">${passed}</div>
                     <div class="metric-label">✅ Pasados</div>
                 </div>
                 <div class="metric failed">
-                    <div class="metric-value">{report.failed}</div>
+                    <div class="metric-value">${failed}</div>
                     <div class="metric-label">❌ Fallidos</div>
                 </div>
                 <div class="metric rate">
-                    <div class="metric-value">{report.pass_rate:.1f}%</div>
+                    <div class="metric-value">${pass_rate_label}%</div>
                     <div class="metric-label">Tasa de Éxito</div>
                 </div>
             </div>
             
             <div class="progress">
-                <div class="progress-bar" style="width: {report.pass_rate}%"></div>
+                <div class="progress-bar" style="width: ${pass_rate}%"></div>
             </div>
         </div>
         
@@ -620,19 +756,7 @@ class ReportGenerator:
                     </tr>
                 </thead>
                 <tbody>
-"""
-        for cat, stats in report.results_by_category.items():
-            rate = (stats["passed"] / stats["total"] * 100) if stats["total"] > 0 else 0
-            html += f"""                    <tr>
-                        <td>{cat}</td>
-                        <td>{stats['total']}</td>
-                        <td>{stats['passed']}</td>
-                        <td>{stats['failed']}</td>
-                        <td>{rate:.0f}%</td>
-                    </tr>
-"""
-        
-        html += """                </tbody>
+${category_rows}                </tbody>
             </table>
         </div>
         
@@ -649,27 +773,112 @@ class ReportGenerator:
                     </tr>
                 </thead>
                 <tbody>
+${result_rows}                </tbody>
+            </table>
+        </div>
+    </div>
+</body>
+</html>""")
+
+
+def _html_category_row(cat: str, stats: Dict) -> str:
+    """Fila de la tabla de resultados por categoría."""
+    rate = (stats["passed"] / stats["total"] * 100) if stats["total"] > 0 else 0
+    return f"""                    <tr>
+                        <td>{escape(cat)}</td>
+                        <td>{stats['total']}</td>
+                        <td>{stats['passed']}</td>
+                        <td>{stats['failed']}</td>
+                        <td>{rate:.0f}%</td>
+                    </tr>
 """
-        for result in report.results:
-            status_class = result.status.value
-            html += f"""                    <tr>
-                        <td>{result.scenario_id}</td>
-                        <td>{result.name}</td>
-                        <td>{result.category}</td>
-                        <td><span class="status {status_class}">{result.status.value.upper()}</span></td>
+
+
+def _html_result_row(result: TestResult) -> str:
+    """Fila de la tabla con todos los tests."""
+    status = result.status.value
+    return f"""                    <tr>
+                        <td>{escape(result.scenario_id)}</td>
+                        <td>{escape(result.name)}</td>
+                        <td>{escape(result.category)}</td>
+                        <td><span class="status {status}">{status.upper()}</span></td>
                         <td>{result.duration_ms:.0f}ms</td>
                     </tr>
 """
+
+
+class ReportGenerator:
+    """Genera reportes en diferentes formatos."""
+    
+    @staticmethod
+    def to_json(report: EvaluationReport, filepath: str) -> None:
+        """Guarda reporte en JSON."""
+        if orjson is not None:
+            payload = orjson.dumps(
+                report.to_dict(),
+                option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+            )
+        else:
+            payload = json.dumps(report.to_dict(), indent=2, ensure_ascii=False).encode("utf-8")
+        Path(filepath).write_bytes(payload)
+    
+    @staticmethod
+    def to_markdown(report: EvaluationReport, filepath: str) -> None:
+        """Guarda reporte en Markdown."""
+        parts = [f"""# Reporte de Evaluación TinRed Agent
+
+**Fecha:** {report.timestamp}
+
+## Resumen
+
+| Métrica | Valor |
+|---------|-------|
+| Total Escenarios | {report.total_scenarios} |
+| ✅ Pasados | {report.passed} |
+| ❌ Fallidos | {report.failed} |
+| ⏭️ Saltados | {report.skipped} |
+| ⚠️ Errores | {report.errors} |
+| **Tasa de Éxito** | **{report.pass_rate:.2f}%** |
+| Duración | {report.duration_total_ms:.0f}ms |
+
+## Resultados por Categoría
+
+| Categoría | Total | Pasados | Fallidos | Tasa |
+|-----------|-------|---------|----------|------|
+"""]
+        append = parts.append
+        for cat, stats in report.results_by_category.items():
+            rate = (stats["passed"] / stats["total"] * 100) if stats["total"] > 0 else 0
+            append(f"| {cat} | {stats['total']} | {stats['passed']} | {stats['failed']} | {rate:.0f}% |\n")
         
-        html += """                </tbody>
-            </table>
-        </div>
-    </div>
-</body>
-</html>"""
+        append("\n## Detalles de Tests Fallidos\n\n")
+        
+        for result in report.results:
+            if result.status is TestStatus.FAILED:
+                append(f"### ❌ [{result.scenario_id}] {result.name}\n\n")
+                append(f"**Categoría:** {result.category}\n\n")
+                if result.errors:
+                    append("**Errores:**\n")
+                    parts.extend(f"- {error}\n" for error in result.errors)
+                append("\n")
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(html)
+        Path(filepath).write_text("".join(parts), encoding="utf-8")
+    
+    @staticmethod
+    def to_html(report: EvaluationReport, filepath: str) -> None:
+        """Guarda reporte en HTML."""
+        html = _REPORT_HTML.substitute(
+            timestamp=escape(report.timestamp),
+            passed=report.passed,
+            failed=report.failed,
+            pass_rate_label=f"{report.pass_rate:.1f}",
+            pass_rate=report.pass_rate,
+            category_rows="".join(
+                [_html_category_row(cat, stats) for cat, stats in report.results_by_category.items()]
+            ),
+            result_rows="".join([_html_result_row(result) for result in report.results])
+        )
+        Path(filepath).write_text(html, encoding="utf-8")
 
 
 async def main():
@@ -691,9 +900,12 @@ async def main():
     
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    ReportGenerator.to_json(report, str(output_dir / f"evaluation_{timestamp}.json"))
-    ReportGenerator.to_markdown(report, str(output_dir / f"evaluation_{timestamp}.md"))
-    ReportGenerator.to_html(report, str(output_dir / f"evaluation_{timestamp}.html"))
+    # Los tres formatos escriben archivos distintos: se generan en paralelo
+    await asyncio.gather(
+        asyncio.to_thread(ReportGenerator.to_json, report, str(output_dir / f"evaluation_{timestamp}.json")),
+        asyncio.to_thread(ReportGenerator.to_markdown, report, str(output_dir / f"evaluation_{timestamp}.md")),
+        asyncio.to_thread(ReportGenerator.to_html, report, str(output_dir / f"evaluation_{timestamp}.html"))
+    )
     
     print("\n" + "=" * 60)
     print("📊 RESUMEN DE EVALUACIÓN")
@@ -11,12 +11,23 @@ Requisitos:
     2. Las variables de entorno deben estar configuradas
     3. El API de TinRed debe estar accesible
 
+Con EVAL_CACHE_AGENT_RESPONSES=1 también se cachean las respuestas del agente
+real y del API (por defecto solo en modo mock).
+
 Uso:
     python examples/integration_example.py
 """
+import os
 import sys
+import json
 import asyncio
 from pathlib import Path
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
 
 # Agregar paths
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -25,6 +36,21 @@ from config import eval_config, api_config
 from evaluators import AgentEvaluator
 from adapters import create_tinred_agent
 
+# Cachés de respuestas por tipo de agente: los turnos idénticos (mismo
+# mensaje y mismo estado de sesión) no vuelven a llamar al agente
+_RESPONSE_CACHES: dict[str, dict] = {}
+
+# Con agentes reales (direct/api) la caché es opcional: un acierto registra
+# ~0 ms y no llega al agente, lo que sesga la latencia y la precisión reportadas
+CACHE_REAL_AGENT_RESPONSES = os.getenv("EVAL_CACHE_AGENT_RESPONSES", "") == "1"
+
+
+def _response_cache(agent_mode: str) -> Optional[dict]:
+    """Caché de respuestas compartida por los evaluadores de un mismo agente (None = sin caché)"""
+    if agent_mode != "mock" and not CACHE_REAL_AGENT_RESPONSES:
+        return None
+    return _RESPONSE_CACHES.setdefault(agent_mode, {})
+
 
 async def run_with_real_agent():
     """
@@ -59,13 +85,16 @@ async def run_with_real_agent():
     except Exception as e:
         print(f"❌ Error creando agente: {e}")
         print("   Usando mock como fallback")
-        agent = create_tinred_agent(mode="mock")
+        mode = "mock"
+        agent = create_tinred_agent(mode=mode)
     
     # Crear evaluador
     print("\n🧪 Creando evaluador...")
     evaluator = AgentEvaluator(
         agent_callable=agent,
-        model_name="gemini-2.5-flash"
+        model_name="gemini-2.5-flash",
+        cache=_response_cache(mode),
+        max_concurrency=8
     )
     
     # Ejecutar evaluación (10 escenarios para ejemplo)
@@ -117,7 +146,9 @@ async def run_with_api():
     
     evaluator = AgentEvaluator(
         agent_callable=agent,
-        model_name="gemini-2.5-flash-api"
+        model_name="gemini-2.5-flash-api",
+        cache=_response_cache("api"),
+        max_concurrency=8
     )
     
     report = await evaluator.run_evaluation(max_scenarios=5)
@@ -139,7 +170,6 @@ async def run_custom_scenarios():
 """)
     
     from config import DATASETS_DIR
-    import json
     
     # Crear dataset personalizado
     custom_scenarios = {
@@ -193,8 +223,11 @@ async def run_custom_scenarios():
     
     # Guardar temporalmente
     custom_path = DATASETS_DIR / "custom_scenarios.json"
-    with open(custom_path, "w", encoding="utf-8") as f:
-        json.dump(custom_scenarios, f, indent=2, ensure_ascii=False)
+    if orjson is not None:
+        custom_path.write_bytes(orjson.dumps(custom_scenarios, option=orjson.OPT_INDENT_2))
+    else:
+        with open(custom_path, "w", encoding="utf-8") as f:
+            json.dump(custom_scenarios, f, indent=2, ensure_ascii=False)
     
     print(f"📄 Dataset personalizado creado: {custom_path}")
     
@@ -203,7 +236,9 @@ async def run_custom_scenarios():
     evaluator = AgentEvaluator(
         agent_callable=agent,
         model_name="mock",
-        dataset_path=custom_path
+        dataset_path=custom_path,
+        cache=_response_cache("mock"),
+        max_concurrency=8
     )
     
     # Ejecutar
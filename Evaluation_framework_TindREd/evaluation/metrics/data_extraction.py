@@ -4,9 +4,23 @@ Evalúa la precisión en la extracción de DNI, RUC, productos y precios
 """
 from dataclasses import dataclass, field
 from typing import Optional
+from functools import lru_cache
+from itertools import chain, repeat
 import re
 
-@dataclass
+# Espacios entre dos dígitos ("0 6 1 0" -> "0610"). Con lookbehind el
+# reemplazo es literal (''), sin expandir grupos en cada coincidencia
+_DIGITS_RE = re.compile(r'(?<=\d)\s+(?=\d)')
+
+
+@lru_cache(maxsize=256)
+def _normalize_digits(text: str) -> str:
+    """Normaliza texto juntando dígitos separados (cacheado: DNI y RUC reusan la respuesta)"""
+    # Convertir "0 6 1 0 4 0 1 1" a "06104011"
+    return _DIGITS_RE.sub('', text)
+
+
+@dataclass(slots=True, frozen=True)
 class ExtractionResult:
     """Resultado de una extracción individual"""
     field_name: str
@@ -14,7 +28,7 @@ class ExtractionResult:
     extracted: Optional[str]
     correct: bool
     
-@dataclass
+@dataclass(slots=True)
 class DataExtractionResult:
     """Resultado completo de evaluación de extracción"""
     accuracy: float  # 0.0 - 1.0
@@ -39,11 +53,12 @@ class DataExtractionMetric:
     description: str = "Mide la precisión de extracción de datos estructurados"
     
     def __init__(self):
-        # Patrones de extracción
-        self.dni_pattern = r'\b(\d{8})\b'
-        self.ruc_pattern = r'\b([12]0\d{9})\b'
-        self.item_pattern = r'(\d+)\s*[x×@]\s*([^@\d]+?)\s*[@a]\s*S?/?\.?\s*(\d+(?:\.\d{2})?)'
-        self.total_pattern = r'(?:total|suma|monto)[:\s]*S?/?\.?\s*([\d,]+\.?\d*)'
+        # Patrones de extracción (compilados una sola vez)
+        self.dni_re = re.compile(r'\b(\d{8})\b')
+        self.ruc_re = re.compile(r'\b([12]0\d{9})\b')
+        self.item_re = re.compile(r'(\d+)\s*[x×@]\s*([^@\d]+?)\s*[@a]\s*S?/?\.?\s*(\d+(?:\.\d{2})?)')
+        self.total_re = re.compile(r'(?:total|suma|monto)[:\s]*S?/?\.?\s*([\d,]+\.?\d*)')
+        self._total_currency_re = re.compile(r'S/\s*([\d,]+\.?\d*)', re.IGNORECASE)
     
     def evaluate(
         self,
@@ -60,26 +75,33 @@ class DataExtractionMetric:
             session_data: Datos de sesión del agente (si disponibles)
         """
         extractions = []
+        # Indicadores por campo, tomados de cada resultado al construirlo
+        dni_correct = ruc_correct = total_correct = False
+        items_correct = True
         
         # Evaluar DNI
         if "id_number" in expected and expected.get("id_type") == "1":
             dni_result = self._evaluate_dni(agent_response, expected["id_number"], session_data)
             extractions.append(dni_result)
+            dni_correct = dni_result.correct
         
         # Evaluar RUC
         if "id_number" in expected and expected.get("id_type") == "6":
             ruc_result = self._evaluate_ruc(agent_response, expected["id_number"], session_data)
             extractions.append(ruc_result)
+            ruc_correct = ruc_result.correct
         
         # Evaluar items
         if "items" in expected:
             items_result = self._evaluate_items(agent_response, expected["items"], session_data)
             extractions.extend(items_result)
+            items_correct = all(e.correct for e in items_result)
         
         # Evaluar total
         if "total" in expected:
             total_result = self._evaluate_total(agent_response, expected["total"], session_data)
             extractions.append(total_result)
+            total_correct = total_result.correct
         
         # Calcular accuracy
         if not extractions:
@@ -91,10 +113,10 @@ class DataExtractionMetric:
         return DataExtractionResult(
             accuracy=accuracy,
             extractions=extractions,
-            dni_correct=any(e.field_name == "dni" and e.correct for e in extractions),
-            ruc_correct=any(e.field_name == "ruc" and e.correct for e in extractions),
-            items_correct=all(e.correct for e in extractions if e.field_name.startswith("item")),
-            total_correct=any(e.field_name == "total" and e.correct for e in extractions)
+            dni_correct=dni_correct,
+            ruc_correct=ruc_correct,
+            items_correct=items_correct,
+            total_correct=total_correct
         )
     
     def _evaluate_dni(
@@ -104,30 +126,7 @@ class DataExtractionMetric:
         session_data: Optional[dict]
     ) -> ExtractionResult:
         """Evalúa extracción de DNI"""
-        # Primero buscar en session_data si disponible
-        extracted = None
-        if session_data and "emission_data" in session_data:
-            extracted = session_data["emission_data"].get("id_number")
-        
-        # Si no, buscar en respuesta
-        if not extracted:
-            # Normalizar: juntar dígitos separados
-            normalized = self._normalize_digits(response)
-            match = re.search(self.dni_pattern, normalized)
-            if match:
-                extracted = match.group(1)
-        
-        # Normalizar expected también
-        expected_normalized = expected_dni.replace(" ", "")
-        
-        correct = extracted == expected_normalized
-        
-        return ExtractionResult(
-            field_name="dni",
-            expected=expected_normalized,
-            extracted=extracted,
-            correct=correct
-        )
+        return self._evaluate_id("dni", self.dni_re, response, expected_dni, session_data)
     
     def _evaluate_ruc(
         self,
@@ -136,26 +135,47 @@ class DataExtractionMetric:
         session_data: Optional[dict]
     ) -> ExtractionResult:
         """Evalúa extracción de RUC"""
-        extracted = None
-        if session_data and "emission_data" in session_data:
-            extracted = session_data["emission_data"].get("id_number")
-        
+        return self._evaluate_id("ruc", self.ruc_re, response, expected_ruc, session_data)
+    
+    def _evaluate_id(
+        self,
+        field_name: str,
+        id_re: re.Pattern,
+        response: str,
+        expected_id: str,
+        session_data: Optional[dict]
+    ) -> ExtractionResult:
+        """Evalúa extracción de un documento de identidad (DNI o RUC)"""
+        # Primero buscar en session_data; el texto solo se revisa si no hay dato
+        extracted = self._extract_id_from_session(session_data)
         if not extracted:
-            normalized = self._normalize_digits(response)
-            match = re.search(self.ruc_pattern, normalized)
-            if match:
-                extracted = match.group(1)
+            extracted = self._extract_id_from_text(response, id_re) or extracted
         
-        expected_normalized = expected_ruc.replace(" ", "")
-        correct = extracted == expected_normalized
+        # Normalizar expected también
+        expected_normalized = expected_id.replace(" ", "")
         
         return ExtractionResult(
-            field_name="ruc",
+            field_name=field_name,
             expected=expected_normalized,
             extracted=extracted,
-            correct=correct
+            correct=extracted == expected_normalized
         )
     
+    @staticmethod
+    def _extract_id_from_session(session_data: Optional[dict]):
+        """Documento registrado en la sesión del agente (si existe)"""
+        if session_data and "emission_data" in session_data:
+            return session_data["emission_data"].get("id_number")
+        return None
+    
+    @staticmethod
+    def _extract_id_from_text(response: str, id_re: re.Pattern) -> Optional[str]:
+        """Busca el documento en la respuesta, con los dígitos separados ya unidos"""
+        # _normalize_digits está cacheado: DNI y RUC sobre la misma respuesta
+        # normalizan el texto una sola vez
+        match = id_re.search(_normalize_digits(response))
+        return match.group(1) if match else None
+    
     def _evaluate_items(
         self,
         response: str,
@@ -170,34 +190,36 @@ class DataExtractionMetric:
         if session_data and "emission_data" in session_data:
             extracted_items = session_data["emission_data"].get("items", [])
         
-        for i, expected_item in enumerate(expected_items):
+        # Métodos enlazados una sola vez, fuera del bucle
+        compare_numbers = self._compare_numbers
+        compare_prices = self._compare_prices
+        append = results.append
+        
+        # Los items esperados sin correspondiente extraído se emparejan con None
+        padded = chain(extracted_items, repeat(None))
+        for i, (expected_item, extracted_item) in enumerate(zip(expected_items, padded)):
             expected_qty = str(expected_item.get("cantidad", ""))
             expected_price = expected_item.get("precio", "")
             
-            # Buscar item correspondiente
-            extracted_qty = None
-            extracted_price = None
-            
-            if i < len(extracted_items):
-                extracted_qty = str(extracted_items[i].get("cantidad", ""))
-                extracted_price = extracted_items[i].get("precio", "")
+            if extracted_item is None:
+                extracted_qty = None
+                extracted_price = None
+            else:
+                extracted_qty = str(extracted_item.get("cantidad", ""))
+                extracted_price = extracted_item.get("precio", "")
             
-            # Evaluar cantidad
-            qty_correct = self._compare_numbers(expected_qty, extracted_qty)
-            results.append(ExtractionResult(
+            # Evaluar cantidad y precio
+            append(ExtractionResult(
                 field_name=f"item_{i}_cantidad",
                 expected=expected_qty,
                 extracted=extracted_qty,
-                correct=qty_correct
+                correct=compare_numbers(expected_qty, extracted_qty)
             ))
-            
-            # Evaluar precio
-            price_correct = self._compare_prices(expected_price, extracted_price)
-            results.append(ExtractionResult(
+            append(ExtractionResult(
                 field_name=f"item_{i}_precio",
                 expected=expected_price,
                 extracted=extracted_price,
-                correct=price_correct
+                correct=compare_prices(expected_price, extracted_price)
             ))
         
         return results
@@ -212,7 +234,7 @@ class DataExtractionMetric:
         extracted = None
         
         # Buscar en respuesta
-        match = re.search(r'S/\s*([\d,]+\.?\d*)', response, re.IGNORECASE)
+        match = self._total_currency_re.search(response)
         if match:
             try:
                 extracted = float(match.group(1).replace(",", ""))
@@ -228,13 +250,8 @@ class DataExtractionMetric:
             correct=correct
         )
     
-    def _normalize_digits(self, text: str) -> str:
-        """Normaliza texto juntando dígitos separados"""
-        # Convertir "0 6 1 0 4 0 1 1" a "06104011"
-        result = re.sub(r'(\d)\s+(?=\d)', r'\1', text)
-        return result
-    
-    def _compare_numbers(self, expected: str, extracted: Optional[str]) -> bool:
+    @staticmethod
+    def _compare_numbers(expected: str, extracted: Optional[str]) -> bool:
         """Compara dos números como strings"""
         if extracted is None:
             return False
@@ -243,7 +260,8 @@ class DataExtractionMetric:
         except (ValueError, TypeError):
             return expected == extracted
     
-    def _compare_prices(self, expected: str, extracted: Optional[str]) -> bool:
+    @staticmethod
+    def _compare_prices(expected: str, extracted: Optional[str]) -> bool:
         """Compara dos precios con tolerancia"""
         if extracted is None:
             return False
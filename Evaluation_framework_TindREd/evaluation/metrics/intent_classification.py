@@ -3,10 +3,17 @@ Métrica de Clasificación de Intención
 Evalúa la precisión del clasificador de intenciones
 """
 from dataclasses import dataclass
+from collections import Counter
+from functools import lru_cache
 from typing import Optional
 from enum import Enum
 import re
 
+try:
+    import hyperscan
+except ImportError:  # pragma: no cover - hyperscan es opcional
+    hyperscan = None
+
 class IntentType(Enum):
     """Tipos de intención del agente"""
     EMIT_INVOICE = "emit_invoice"
@@ -18,7 +25,7 @@ class IntentType(Enum):
     CANCELLATION = "cancellation"
     UNKNOWN = "unknown"
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class IntentClassificationResult:
     """Resultado de clasificación de intención"""
     expected_intent: str
@@ -26,6 +33,41 @@ class IntentClassificationResult:
     correct: bool
     confidence: float = 0.0
 
+
+# Mapeo de aliases a la intención canónica
+_INTENT_ALIASES = {
+    "emission": "emit_invoice",
+    "emit": "emit_invoice",
+    "invoice": "emit_invoice",
+    "boleta": "emit_invoice",
+    "factura": "emit_invoice",
+    "history": "query_history",
+    "historial": "query_history",
+    "products": "query_products",
+    "productos": "query_products",
+    "hello": "greeting",
+    "hola": "greeting",
+    "saludo": "greeting",
+    "ayuda": "help",
+    "cancel": "cancellation",
+    "cancelar": "cancellation",
+    "confirm": "confirmation",
+    "confirmar": "confirmation",
+}
+
+
+@lru_cache(maxsize=128)
+def _normalize_intent(intent: str) -> str:
+    """Normaliza el nombre de la intención (pocos valores distintos: cacheado)"""
+    intent_lower = intent.lower().strip()
+    return _INTENT_ALIASES.get(intent_lower, intent_lower)
+
+
+def _collect_match(pattern_id: int, start: int, end: int, flags: int, matched: set) -> None:
+    """Callback de hyperscan: registra el id del patrón encontrado"""
+    matched.add(pattern_id)
+
+
 class IntentClassificationMetric:
     """
     Métrica de Clasificación de Intención
@@ -39,7 +81,7 @@ class IntentClassificationMetric:
     
     def __init__(self):
         # Patrones para inferir intención de la respuesta
-        self.intent_patterns = {
+        intent_patterns = {
             IntentType.EMIT_INVOICE: [
                 r"boleta",
                 r"factura",
@@ -87,6 +129,14 @@ class IntentClassificationMetric:
                 r"operación.*cancelada",
             ],
         }
+        # Compilados una sola vez; se aplican sobre la respuesta ya en minúsculas
+        # (los patrones son literales en minúsculas), así que sin IGNORECASE
+        self.intent_patterns: dict[IntentType, list[re.Pattern]] = {
+            intent: [re.compile(p) for p in patterns]
+            for intent, patterns in intent_patterns.items()
+        }
+        # Con hyperscan todos los patrones se evalúan en un único escaneo
+        self._hs_db, self._hs_intents = self._build_hyperscan_db(intent_patterns)
     
     def evaluate(
         self,
@@ -105,20 +155,23 @@ class IntentClassificationMetric:
             classifier_output: Output directo del clasificador (si disponible)
         """
         # Si tenemos output del clasificador, usarlo
+        scores = None
         if classifier_output:
             predicted = classifier_output
         else:
-            # Inferir de la respuesta del agente
-            predicted = self._infer_intent_from_response(agent_response)
+            # Inferir de la respuesta del agente (los scores se reutilizan
+            # para la confianza y evitan una segunda pasada de patrones)
+            scores = self._intent_scores(agent_response.lower())
+            predicted = self._best_intent(scores)
         
         # Normalizar
-        expected_normalized = self._normalize_intent(expected_intent)
-        predicted_normalized = self._normalize_intent(predicted)
+        expected_normalized = _normalize_intent(expected_intent)
+        predicted_normalized = _normalize_intent(predicted)
         
         correct = expected_normalized == predicted_normalized
         
         # Calcular confianza basada en cuántos patrones coinciden
-        confidence = self._calculate_confidence(agent_response, predicted_normalized)
+        confidence = self._calculate_confidence(agent_response, predicted_normalized, scores)
         
         return IntentClassificationResult(
             expected_intent=expected_normalized,
@@ -129,14 +182,60 @@ class IntentClassificationMetric:
     
     def _infer_intent_from_response(self, response: str) -> str:
         """Infiere la intención desde la respuesta del agente"""
-        response_lower = response.lower()
+        return self._best_intent(self._intent_scores(response.lower()))
+    
+    @staticmethod
+    def _build_hyperscan_db(intent_patterns: dict[IntentType, list[str]]):
+        """
+        Compila los patrones en una base de hyperscan (si está instalado)
+        
+        Returns:
+            Tupla (base, intención de cada id de patrón); (None, None) si
+            hyperscan no está disponible o no acepta algún patrón
+        """
+        if hyperscan is None:
+            return None, None
+        
+        flat = [(intent, p) for intent, patterns in intent_patterns.items() for p in patterns]
+        db = hyperscan.Database()
+        try:
+            db.compile(
+                expressions=[p.encode("utf-8") for _, p in flat],
+                ids=list(range(len(flat))),
+                elements=len(flat),
+                # SINGLEMATCH: cada patrón cuenta una vez, como con re.search
+                flags=hyperscan.HS_FLAG_UTF8 | hyperscan.HS_FLAG_SINGLEMATCH
+            )
+        except hyperscan.error:  # pragma: no cover - se usa el camino con re
+            return None, None
+        return db, [intent for intent, _ in flat]
+    
+    def _intent_scores(self, response_lower: str) -> dict[IntentType, int]:
+        """Cantidad de patrones de cada intención presentes en la respuesta"""
+        if self._hs_db is not None:
+            matched: set[int] = set()
+            self._hs_db.scan(
+                response_lower.encode("utf-8"),
+                match_event_handler=_collect_match,
+                context=matched
+            )
+            # Los ids siguen el orden de intent_patterns: al recorrerlos
+            # ordenados, el dict conserva el desempate de max()
+            hs_scores: dict[IntentType, int] = {}
+            for pattern_id in sorted(matched):
+                intent = self._hs_intents[pattern_id]
+                hs_scores[intent] = hs_scores.get(intent, 0) + 1
+            return hs_scores
         
         scores = {}
         for intent, patterns in self.intent_patterns.items():
-            score = sum(1 for p in patterns if re.search(p, response_lower, re.IGNORECASE))
+            score = sum(1 for p in patterns if p.search(response_lower))
             if score > 0:
                 scores[intent] = score
-        
+        return scores
+    
+    def _best_intent(self, scores: dict[IntentType, int]) -> str:
+        """Intención con mayor score (la primera en caso de empate)"""
         if not scores:
             return IntentType.UNKNOWN.value
         
@@ -144,35 +243,13 @@ class IntentClassificationMetric:
         best_intent = max(scores, key=scores.get)
         return best_intent.value
     
-    def _normalize_intent(self, intent: str) -> str:
-        """Normaliza el nombre de la intención"""
-        intent_lower = intent.lower().strip()
-        
-        # Mapeo de aliases
-        aliases = {
-            "emission": "emit_invoice",
-            "emit": "emit_invoice",
-            "invoice": "emit_invoice",
-            "boleta": "emit_invoice",
-            "factura": "emit_invoice",
-            "history": "query_history",
-            "historial": "query_history",
-            "products": "query_products",
-            "productos": "query_products",
-            "hello": "greeting",
-            "hola": "greeting",
-            "saludo": "greeting",
-            "ayuda": "help",
-            "cancel": "cancellation",
-            "cancelar": "cancellation",
-            "confirm": "confirmation",
-            "confirmar": "confirmation",
-        }
-        
-        return aliases.get(intent_lower, intent_lower)
-    
-    def _calculate_confidence(self, response: str, intent: str) -> float:
-        """Calcula confianza de la clasificación"""
+    def _calculate_confidence(
+        self,
+        response: str,
+        intent: str,
+        scores: Optional[dict[IntentType, int]] = None
+    ) -> float:
+        """Calcula confianza de la clasificación (reutiliza scores si se dan)"""
         try:
             intent_enum = IntentType(intent)
         except ValueError:
@@ -182,10 +259,19 @@ class IntentClassificationMetric:
         if not patterns:
             return 0.0
         
-        matches = sum(1 for p in patterns if re.search(p, response.lower(), re.IGNORECASE))
+        if scores is not None:
+            matches = scores.get(intent_enum, 0)
+        else:
+            response_lower = response.lower()
+            matches = sum(1 for p in patterns if p.search(response_lower))
         return min(matches / len(patterns), 1.0)
 
 
+def _count_pairs(results: list[IntentClassificationResult]) -> Counter:
+    """Cuenta los pares (esperada, predicha) en una sola pasada"""
+    return Counter((r.expected_intent, r.predicted_intent) for r in results)
+
+
 def calculate_intent_f1(results: list[IntentClassificationResult]) -> dict:
     """
     Calcula F1-score para clasificación de intenciones
@@ -196,29 +282,34 @@ def calculate_intent_f1(results: list[IntentClassificationResult]) -> dict:
     if not results:
         return {"f1_macro": 0.0}
     
-    # Obtener todas las clases
-    all_intents = set()
-    for r in results:
-        all_intents.add(r.expected_intent)
-        all_intents.add(r.predicted_intent)
+    # TP, predichos y soporte por clase a partir de la matriz de confusión,
+    # sin recorrer results una vez por clase
+    tp = Counter()
+    predicted = Counter()
+    support = Counter()
+    for (expected, pred), count in _count_pairs(results).items():
+        support[expected] += count
+        predicted[pred] += count
+        if expected == pred:
+            tp[expected] += count
     
     # Calcular métricas por clase
     metrics_per_class = {}
     
-    for intent in all_intents:
-        tp = sum(1 for r in results if r.expected_intent == intent and r.predicted_intent == intent)
-        fp = sum(1 for r in results if r.expected_intent != intent and r.predicted_intent == intent)
-        fn = sum(1 for r in results if r.expected_intent == intent and r.predicted_intent != intent)
+    for intent in sorted(support.keys() | predicted.keys()):
+        class_tp = tp[intent]
+        fp = predicted[intent] - class_tp
+        fn = support[intent] - class_tp
         
-        precision = tp / (tp + fp) if (tp + fp) > 0 else 0.0
-        recall = tp / (tp + fn) if (tp + fn) > 0 else 0.0
+        precision = class_tp / (class_tp + fp) if (class_tp + fp) > 0 else 0.0
+        recall = class_tp / (class_tp + fn) if (class_tp + fn) > 0 else 0.0
         f1 = 2 * precision * recall / (precision + recall) if (precision + recall) > 0 else 0.0
         
         metrics_per_class[intent] = {
             "precision": precision,
             "recall": recall,
             "f1": f1,
-            "support": sum(1 for r in results if r.expected_intent == intent)
+            "support": support[intent]
         }
     
     # Calcular macro-average
@@ -242,16 +333,15 @@ def create_confusion_matrix(results: list[IntentClassificationResult]) -> dict:
     Returns:
         Dict con matriz y labels
     """
-    labels = sorted(set(r.expected_intent for r in results) | set(r.predicted_intent for r in results))
+    pairs = _count_pairs(results)
+    labels = sorted({expected for expected, _ in pairs} | {pred for _, pred in pairs})
     
     matrix = [[0 for _ in labels] for _ in labels]
     
     label_to_idx = {label: i for i, label in enumerate(labels)}
     
-    for r in results:
-        true_idx = label_to_idx.get(r.expected_intent, 0)
-        pred_idx = label_to_idx.get(r.predicted_intent, 0)
-        matrix[true_idx][pred_idx] += 1
+    for (expected, pred), count in pairs.items():
+        matrix[label_to_idx[expected]][label_to_idx[pred]] += count
     
     return {
         "labels": labels,
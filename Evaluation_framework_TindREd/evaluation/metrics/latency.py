@@ -4,9 +4,15 @@ Mide tiempos de respuesta del agente
 """
 from dataclasses import dataclass, field
 from typing import Optional
+from bisect import insort
 import time
 import statistics
 
+try:
+    from sortedcontainers import SortedList
+except ImportError:  # pragma: no cover - sortedcontainers es opcional
+    SortedList = None
+
 @dataclass
 class LatencyMeasurement:
     """Una medición individual de latencia"""
@@ -29,6 +35,19 @@ class LatencyResult:
     target_ms: float
     measurements: list[LatencyMeasurement] = field(default_factory=list)
 
+def _percentile(sorted_values: list[float], q: float) -> float:
+    """
+    Percentil q (0-100) con interpolación lineal sobre valores ya ordenados
+    
+    Mismo criterio que numpy.percentile(method="linear"): la posición es
+    (n - 1) * q / 100 y se interpola entre los dos valores vecinos.
+    """
+    pos = (len(sorted_values) - 1) * q / 100
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
 class LatencyMetric:
     """
     Métrica de Latencia
@@ -42,7 +61,7 @@ class LatencyMetric:
     
     def __init__(self, target_ms: float = 3000.0):
         self.target_ms = target_ms
-        self.measurements: list[LatencyMeasurement] = []
+        self.reset()
     
     def start_measurement(self, scenario_id: str) -> "LatencyTimer":
         """Inicia una medición de latencia"""
@@ -52,10 +71,41 @@ class LatencyMetric:
         """Agrega una medición"""
         self.measurements.append(measurement)
     
+    def _sync_sorted_times(self) -> None:
+        """
+        Pone al día los tiempos ordenados a partir de self.measurements
+        
+        measurements es la única fuente: solo se insertan las mediciones
+        agregadas desde la última sincronización (por add_measurement o
+        directamente en la lista); si la lista se reemplazó o se acortó,
+        los tiempos se reconstruyen. Reemplazar una entrada en su lugar no
+        se detecta: para corregir mediciones, asignar una lista nueva.
+        """
+        measurements = self.measurements
+        if measurements is not self._synced_list or len(measurements) < self._synced_count:
+            self._sorted_times = SortedList() if SortedList is not None else []
+            self._sum_ms = 0.0
+            self._synced_list = measurements
+            self._synced_count = 0
+        
+        for m in measurements[self._synced_count:]:
+            total = m.total_time_ms
+            if SortedList is not None:
+                self._sorted_times.add(total)
+            else:
+                insort(self._sorted_times, total)
+            self._sum_ms += total
+        self._synced_count = len(measurements)
+    
     def evaluate(self) -> LatencyResult:
         """
         Calcula métricas agregadas de latencia
+        
+        Los tiempos se mantienen ordenados de forma incremental, así que cada
+        estadística es una lectura directa.
         """
+        self._sync_sorted_times()
+        
         if not self.measurements:
             return LatencyResult(
                 mean_ms=0.0,
@@ -68,21 +118,17 @@ class LatencyMetric:
                 target_ms=self.target_ms
             )
         
-        times = [m.total_time_ms for m in self.measurements]
-        times_sorted = sorted(times)
+        times_sorted = self._sorted_times
         
-        mean_ms = statistics.mean(times)
-        median_ms = statistics.median(times)
+        mean_ms = self._sum_ms / len(times_sorted)
+        median_ms = _percentile(times_sorted, 50)
         
-        # Percentiles
-        p95_idx = int(len(times_sorted) * 0.95)
-        p99_idx = int(len(times_sorted) * 0.99)
+        # Percentiles (interpolados, sin el sesgo de índice en N pequeños)
+        p95_ms = _percentile(times_sorted, 95)
+        p99_ms = _percentile(times_sorted, 99)
         
-        p95_ms = times_sorted[min(p95_idx, len(times_sorted) - 1)]
-        p99_ms = times_sorted[min(p99_idx, len(times_sorted) - 1)]
-        
-        min_ms = min(times)
-        max_ms = max(times)
+        min_ms = times_sorted[0]
+        max_ms = times_sorted[-1]
         
         # Verificar si p95 está dentro del target
         within_target = p95_ms <= self.target_ms
@@ -101,7 +147,13 @@ class LatencyMetric:
     
     def reset(self):
         """Reinicia las mediciones"""
-        self.measurements = []
+        self.measurements: list[LatencyMeasurement] = []
+        # Tiempos totales ordenados y su suma, derivados de measurements en
+        # _sync_sorted_times (lista sincronizada y cuántas mediciones incluye)
+        self._sorted_times = SortedList() if SortedList is not None else []
+        self._sum_ms = 0.0
+        self._synced_list: Optional[list[LatencyMeasurement]] = None
+        self._synced_count = 0
 
 
 class LatencyTimer:
@@ -129,6 +181,14 @@ class LatencyTimer:
         self.llm_end: float = 0.0
         self.api_start: float = 0.0
         self.api_end: float = 0.0
+        
+        # Medición propia de este timer (se asigna al salir del contexto)
+        self.measurement: Optional[LatencyMeasurement] = None
+    
+    @property
+    def result_ms(self) -> float:
+        """Latencia total medida por este timer (0 si aún no termina)"""
+        return self.measurement.total_time_ms if self.measurement else 0.0
     
     def __enter__(self) -> "LatencyTimer":
         self.start_time = time.perf_counter() * 1000  # ms
@@ -136,13 +196,17 @@ class LatencyTimer:
     
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.end_time = time.perf_counter() * 1000  # ms
+        if exc_type is not None:
+            # Escenario fallido (p. ej. límite de tasa agotado): su tiempo no
+            # es una latencia del agente y no entra en las estadísticas
+            return False
         
         total_time = self.end_time - self.start_time
         llm_time = (self.llm_end - self.llm_start) if self.llm_end > 0 else 0.0
         api_time = (self.api_end - self.api_start) if self.api_end > 0 else 0.0
         processing_time = total_time - llm_time - api_time
         
-        measurement = LatencyMeasurement(
+        self.measurement = LatencyMeasurement(
             scenario_id=self.scenario_id,
             total_time_ms=total_time,
             llm_time_ms=llm_time,
@@ -150,7 +214,7 @@ class LatencyTimer:
             processing_time_ms=max(0, processing_time)
         )
         
-        self.metric.add_measurement(measurement)
+        self.metric.add_measurement(self.measurement)
         return False
     
     def mark_llm_start(self):
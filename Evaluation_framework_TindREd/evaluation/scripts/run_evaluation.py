@@ -22,6 +22,7 @@ def parse_args():
     parser.add_argument("--categories", type=str, help="Categorías a evaluar (separadas por coma)")
     parser.add_argument("--output-dir", default="reports", help="Directorio de salida")
     parser.add_argument("--timeout", type=int, default=30, help="Timeout en segundos")
+    parser.add_argument("--concurrency", type=int, default=8, help="Escenarios en paralelo (las conversaciones se ejecutan de a una)")
     
     return parser.parse_args()
 
@@ -41,7 +42,8 @@ async def main():
     evaluator = TinRedEvaluator({
         "api_url": args.api_url, 
         "timeout": args.timeout,
-        "test_phone": args.phone
+        "test_phone": args.phone,
+        "concurrency": args.concurrency
     })
     report = await evaluator.run_all_tests(categories)
     
@@ -51,9 +53,12 @@ async def main():
     
     ts = datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    ReportGenerator.to_json(report, str(output_dir / f"eval_{ts}.json"))
-    ReportGenerator.to_markdown(report, str(output_dir / f"eval_{ts}.md"))
-    ReportGenerator.to_html(report, str(output_dir / f"eval_{ts}.html"))
+    # Los tres formatos escriben archivos distintos: se generan en paralelo
+    await asyncio.gather(
+        asyncio.to_thread(ReportGenerator.to_json, report, str(output_dir / f"eval_{ts}.json")),
+        asyncio.to_thread(ReportGenerator.to_markdown, report, str(output_dir / f"eval_{ts}.md")),
+        asyncio.to_thread(ReportGenerator.to_html, report, str(output_dir / f"eval_{ts}.html"))
+    )
     
     # Resumen
     print(f"\n📊 Resultados: {report.passed}/{report.total_scenarios} ({report.pass_rate:.1f}%)")